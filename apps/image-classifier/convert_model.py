@@ -1,11 +1,126 @@
 #!/usr/bin/env python3
 
-import tensorflow as tf
-import numpy as np
+import argparse
 import os
-import json
+import shutil
+import subprocess
+import sys
 
-def convert_h5_to_tfjs():
+# tensorflowjs_converter weight quantization flags for each precision.
+# For float16, the client should also call
+# tf.env().set('WEBGL_FORCE_F16_TEXTURES', true) so the WebGL backend keeps
+# the weights in half-precision textures.
+QUANTIZATION_FLAGS = {
+    'float32': [],
+    'float16': ['--quantize_float16=*'],
+    'uint8': ['--quantize_uint8=*'],
+}
+
+def prune_model(model, sparsity=0.5, epochs=2, batch_size=64, verbose=False):
+    """Zero out the lowest-magnitude weights and fine-tune to recover accuracy.
+
+    Sparse weights compress much better under gzip, shrinking the weight
+    shards served to the browser. tfmot only wraps tf_keras models, so the
+    model must have been loaded with tf_keras. Fine-tuning assumes a CIFAR-10
+    classifier fed [0, 1] pixels, and reuses the loss the model was compiled
+    with (categorical_crossentropy if it was saved uncompiled). The pruning
+    wrappers are stripped before returning so the converters see a plain
+    tf_keras model.
+    """
+
+    import tensorflow as tf
+    import tensorflow_model_optimization as tfmot
+    import tf_keras
+
+    loss = model.loss or 'categorical_crossentropy'
+    loss_name = loss if isinstance(loss, str) else getattr(loss, 'name', type(loss).__name__)
+    sparse_labels = 'sparse' in loss_name.lower()
+    num_classes = model.outputs[0].shape[-1]
+
+    (x_train, y_train), _ = tf.keras.datasets.cifar10.load_data()
+    height, width = model.inputs[0].shape[1:3]
+
+    def preprocess(image, label):
+        image = tf.image.resize(tf.cast(image, tf.float32) / 255.0, (height, width))
+        if not sparse_labels:
+            label = tf.one_hot(label[0], num_classes)
+        return image, label
+
+    dataset = (tf.data.Dataset.from_tensor_slices((x_train, y_train))
+               .map(preprocess, num_parallel_calls=tf.data.AUTOTUNE)
+               .batch(batch_size)
+               .prefetch(tf.data.AUTOTUNE))
+
+    pruned = tfmot.sparsity.keras.prune_low_magnitude(
+        model,
+        pruning_schedule=tfmot.sparsity.keras.ConstantSparsity(sparsity, 0)
+    )
+    pruned.compile(
+        optimizer=tf_keras.optimizers.Adam(learning_rate=1e-4),
+        loss=loss,
+        metrics=['accuracy']
+    )
+    pruned.fit(dataset, epochs=epochs, verbose=1 if verbose else 2,
+               callbacks=[tfmot.sparsity.keras.UpdatePruningStep()])
+
+    stripped = tfmot.sparsity.keras.strip_pruning(pruned)
+
+    # Report the sparsity actually reached by the prunable kernels
+    kernels = [w.numpy() for w in stripped.weights if 'kernel' in w.name]
+    zeros = sum(int((k == 0).sum()) for k in kernels)
+    total = sum(k.size for k in kernels)
+    print(f"✂️ Kernel sparsity after pruning: {zeros / max(total, 1):.1%}")
+
+    return stripped
+
+def export_tflite(model, saved_model_dir, model_path, full_int8=False, num_calibration_samples=100):
+    """Export a quantized TFLite model next to the source model.
+
+    Converts from the SavedModel already exported for TF.js, as
+    from_keras_model does not support Keras 3. Dynamic-range quantization
+    stores the weights as int8. With full_int8, activations are also
+    calibrated on CIFAR-10 test images so every op runs on the TFLite int8
+    builtin kernels. The file is kept out of public/ since it targets
+    edge/mobile runtimes, not the web app.
+    """
+
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if full_int8:
+        (_, _), (x_test, _) = tf.keras.datasets.cifar10.load_data()
+        height, width = model.inputs[0].shape[1:3]
+
+        def representative_dataset():
+            for image in x_test[:num_calibration_samples]:
+                image = tf.image.resize(image.astype('float32') / 255.0, (height, width))
+                yield [tf.expand_dims(image, 0)]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        suffix = 'int8'
+    else:
+        suffix = 'dynrange'
+    output_path = f"{os.path.splitext(model_path)[0]}_{suffix}.tflite"
+
+    tflite_model = converter.convert()
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+
+    print(f"✅ TFLite model saved: {output_path} ({len(tflite_model)} bytes)")
+    return output_path
+
+def sparsity_fraction(value):
+    """argparse type for --prune: a float strictly between 0 and 1"""
+
+    sparsity = float(value)
+    if not 0 < sparsity < 1:
+        raise argparse.ArgumentTypeError(f"sparsity must be between 0 and 1 (exclusive), got {value}")
+    return sparsity
+
+def convert_h5_to_tfjs(precision='uint8', tflite=None, prune=None, verbose=False):
     """Convert CIFAR-10 high accuracy model to TensorFlow.js format"""
 
     # Try available model files in order of preference
@@ -26,42 +141,87 @@ def convert_h5_to_tfjs():
         print("Looking for:", model_files)
         return False
 
+    # Check for the converter before paying for the TensorFlow import and
+    # the full model load
+    if shutil.which('tensorflowjs_converter') is None:
+        print("❌ tensorflowjs_converter not found. Run: pip install tensorflowjs")
+        return False
+
+    # TensorFlow is imported only once there is a model to convert
+    import tensorflow as tf
+
+    # Pruning runs on tf_keras, since tfmot rejects Keras 3 models
+    if prune:
+        try:
+            import tensorflow_model_optimization  # noqa: F401
+            import tf_keras
+        except ImportError:
+            print("❌ Pruning needs tf_keras and tfmot. Run: pip install tf-keras tensorflow-model-optimization")
+            return False
+        load_model = tf_keras.models.load_model
+    else:
+        load_model = tf.keras.models.load_model
+
     print(f"📥 Loading model from: {model_path}")
 
     # Handle different model formats
-    if model_path.endswith('.h5'):
-        model = tf.keras.models.load_model(model_path)
-    elif model_path.endswith('.keras'):
-        model = tf.keras.models.load_model(model_path)
-    else:
+    if not model_path.endswith(('.h5', '.keras')):
         print("❌ Unsupported model format")
         return False
 
+    try:
+        model = load_model(model_path)
+    except Exception as e:
+        # tf_keras cannot read .keras archives written by Keras 3
+        print(f"❌ Failed to load model: {e}")
+        return False
+
     print("✅ Model loaded successfully!")
 
     # Display model summary
-    print("\n📊 Model Summary:")
-    model.summary()
+    if verbose:
+        print("\n📊 Model Summary:")
+        model.summary()
+
+    if prune:
+        print(f"\n✂️ Pruning to {prune:.0%} sparsity and fine-tuning...")
+        try:
+            model = prune_model(model, sparsity=prune, verbose=verbose)
+        except Exception as e:
+            # e.g. tfmot rejects nested submodels such as the vgg16 base
+            print(f"❌ Pruning failed: {e}")
+            return False
+        print("✅ Pruning complete!")
 
-    # Create output directory
+    # Create a clean output directory so shards from a previous run at a
+    # different precision are not left behind in public/
     output_dir = 'public/tfjs_model'
+    shutil.rmtree(output_dir, ignore_errors=True)
     os.makedirs(output_dir, exist_ok=True)
 
-    # Convert using SavedModel format (more compatible)
+    # Convert using SavedModel format (more compatible), quantizing the
+    # weights to the requested precision (uint8 gives a ~4x smaller download)
     print(f"\n🔄 Converting to TensorFlow.js format...")
     print(f"Output directory: {output_dir}")
+    print(f"Weight precision: {precision}")
 
-    # Save as SavedModel first, then convert
+    # Save as SavedModel first, then convert. The TFLite export reuses it, so
+    # it is only removed once both converters have run.
     saved_model_dir = 'temp_saved_model'
-    model.export(saved_model_dir, format='tf_saved_model')
+    if prune:
+        # tf_keras Model.export has no format argument; save the SavedModel directly
+        tf.saved_model.save(model, saved_model_dir)
+    else:
+        model.export(saved_model_dir, format='tf_saved_model')
 
-    # Convert using the converters API (avoiding deprecated save_keras_model)
-    import subprocess
     try:
+        # Convert with the CLI (avoiding deprecated save_keras_model, which
+        # writes a Keras 3 topology that TF.js cannot load)
         result = subprocess.run([
             'tensorflowjs_converter',
             '--input_format=tf_saved_model',
             '--output_format=tfjs_graph_model',
+            *QUANTIZATION_FLAGS[precision],
             saved_model_dir,
             output_dir
         ], capture_output=True, text=True)
@@ -72,66 +232,41 @@ def convert_h5_to_tfjs():
             print(f"❌ Conversion failed: {result.stderr}")
             return False
 
-    except FileNotFoundError:
-        print("❌ tensorflowjs_converter not found. Using alternative method...")
-
-        # Alternative: Manual conversion (simplified for basic models)
-        print("🔧 Using alternative conversion method...")
-
-        # Save weights and create model.json manually
-        weights_path = os.path.join(output_dir, 'weights.bin')
-        model_json_path = os.path.join(output_dir, 'model.json')
-
-        # This is a simplified approach - for production, you'd need full tfjs conversion
-        print("⚠️  Alternative conversion may not work for complex models")
-
-        # Try to get model weights
-        weights = model.get_weights()
-        if weights:
-            # Serialize weights (simplified)
-            weight_data = b''
-            for w in weights:
-                weight_data += w.tobytes()
-
-            with open(weights_path, 'wb') as f:
-                f.write(weight_data)
-
-            # Create basic model.json (simplified)
-            model_config = model.to_json()
-            with open(model_json_path, 'w') as f:
-                json.dump({
-                    'modelTopology': json.loads(model_config),
-                    'weightsManifest': [{
-                        'paths': ['weights.bin'],
-                        'weights': []
-                    }],
-                    'format': 'layers-model',
-                    'generatedBy': 'TensorFlow.js',
-                    'convertedBy': 'custom-converter'
-                }, f, indent=2)
-
-            print("✅ Alternative conversion completed (limited compatibility)")
-        else:
-            print("❌ Could not extract model weights")
-
-    # Clean up temp directory
-    if os.path.exists(saved_model_dir):
-        import shutil
-        shutil.rmtree(saved_model_dir)
-
-    # Verify output files
-    expected_files = ['model.json', 'weights.bin']
-    print("\n📁 Generated files:")
-    for file in expected_files:
-        file_path = os.path.join(output_dir, file)
-        if os.path.exists(file_path):
-            size = os.path.getsize(file_path)
+        if tflite:
+            print(f"\n🔄 Exporting TFLite model ({tflite})...")
+            try:
+                export_tflite(model, saved_model_dir, model_path, full_int8=(tflite == 'int8'))
+            except Exception as e:
+                print(f"❌ TFLite export failed: {e}")
+                return False
+    finally:
+        # Clean up temp directory
+        shutil.rmtree(saved_model_dir, ignore_errors=True)
+
+    # Verify output files (model.json plus sharded group1-shard*of*.bin)
+    if verbose:
+        print("\n📁 Generated files:")
+        for file in sorted(os.listdir(output_dir)):
+            size = os.path.getsize(os.path.join(output_dir, file))
             print(f"✅ {file}: {size} bytes")
-        else:
-            print(f"❌ {file}: Missing")
 
-    print(f"\n🎉 CIFAR-10 model ready! Load from: /tfjs_model/model.json")
+    print(f"\n🎉 CIFAR-10 model ready! Load with tf.loadGraphModel('/tfjs_model/model.json')")
+    if precision == 'float16':
+        print("💡 Enable fp16 textures in the client: tf.env().set('WEBGL_FORCE_F16_TEXTURES', true)")
     return True
 
 if __name__ == "__main__":
-    convert_h5_to_tfjs()
+    parser = argparse.ArgumentParser(description="Convert the CIFAR-10 model to TensorFlow.js")
+    parser.add_argument('--precision', choices=list(QUANTIZATION_FLAGS), default='uint8',
+                        help="Weight precision of the exported model (default: uint8)")
+    parser.add_argument('--tflite', choices=['dynamic', 'int8'],
+                        help="Also export a quantized TFLite model (dynamic-range or full int8)")
+    parser.add_argument('--prune', type=sparsity_fraction, metavar='SPARSITY',
+                        help="Prune to this fraction of zero weights (e.g. 0.5) before export")
+    parser.add_argument('--verbose', action='store_true',
+                        help="Print the model summary, per-batch training progress and generated files")
+    args = parser.parse_args()
+
+    success = convert_h5_to_tfjs(precision=args.precision, tflite=args.tflite, prune=args.prune,
+                                 verbose=args.verbose)
+    sys.exit(0 if success else 1)
@@ -6,6 +6,7 @@ import os
 import json
 from tensorflow.keras import layers, models
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 def fix_model_architecture():
     """Fix CIFAR-10 model for TF.js compatibility by rebuilding with simple architecture"""
@@ -36,9 +37,10 @@ def fix_model_architecture():
 
     # Test the source model to ensure it works
     print("\nTesting source model...")
-    dummy_input = np.random.rand(1, 32, 32, 3)
+    # Take the input size from the model itself rather than assuming 32x32
     try:
-        predictions = source_model.predict(dummy_input)
+        source_input = np.random.rand(1, *source_model.inputs[0].shape[1:])
+        predictions = source_model.predict(source_input)
         print(f"✅ Source model prediction shape: {predictions.shape}")
     except Exception as e:
         print(f"❌ Source model test failed: {e}")
@@ -126,7 +128,8 @@ def fix_model_architecture():
     # Test the new model
     print("\n🧪 Testing new model...")
     try:
-        test_predictions = new_model.predict(dummy_input)
+        new_input = np.random.rand(1, *new_model.inputs[0].shape[1:])
+        test_predictions = new_model.predict(new_input)
         print(f"✅ New model prediction shape: {test_predictions.shape}")
     except Exception as e:
         print(f"❌ New model test failed: {e}")
@@ -183,28 +186,56 @@ def fix_model_architecture():
         # Manual weights extraction and JSON creation
         print("🔧 Using manual TF.js conversion...")
 
-        weights = new_model.get_weights()
-        if weights:
-            weight_data = b''
-            for w in weights:
-                weight_data += w.tobytes()
-
-            with open(os.path.join(output_dir, 'weights.bin'), 'wb') as f:
-                f.write(weight_data)
-
-            # Create model.json
-            model_config = new_model.to_json()
-            with open(os.path.join(output_dir, 'model.json'), 'w') as f:
-                json.dump({
-                    'modelTopology': json.loads(model_config),
-                    'weightsManifest': [{
-                        'paths': ['weights.bin'],
-                        'weights': []
-                    }],
-                    'format': 'layers-model',
-                    'generatedBy': 'TensorFlow.js',
-                    'convertedBy': 'architecture-fix'
-                }, f, indent=2)
+        # This layers-model fallback only loads in TF.js under tf_keras
+        # (TF_USE_LEGACY_KERAS=1). Keras 3's to_json() topology (batch_shape,
+        # DTypePolicy) is not readable by tf.loadLayersModel.
+        if not tf.keras.__version__.startswith('2.'):
+            print("⚠️ Keras 3 topology: the fallback model.json will not load in TF.js."
+                  " Re-run with TF_USE_LEGACY_KERAS=1")
+
+        # Record every weight in the manifest in the same order it is
+        # serialized to weights.bin so TF.js can slice the buffer
+        weight_specs = []
+        for layer in new_model.layers:
+            for variable in layer.weights:
+                name = variable.name.split(':')[0]
+                if '/' not in name:
+                    name = f"{layer.name}/{name}"
+                weight_specs.append({
+                    'name': name,
+                    'shape': [int(dim) for dim in variable.shape],
+                    'dtype': 'float32'
+                })
+
+        if weight_specs:
+            def write_model_json():
+                model_config = new_model.to_json()
+                with open(os.path.join(output_dir, 'model.json'), 'w') as f:
+                    json.dump({
+                        'modelTopology': json.loads(model_config),
+                        'weightsManifest': [{
+                            'paths': ['weights.bin'],
+                            'weights': weight_specs
+                        }],
+                        'format': 'layers-model',
+                        'generatedBy': 'TensorFlow.js',
+                        'convertedBy': 'architecture-fix'
+                    }, f, indent=2)
+
+            # The manifest only needs shapes, so write model.json on a worker
+            # thread while the weights are converted to little-endian float32
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                json_future = executor.submit(write_model_json)
+
+                weight_data = b''.join(
+                    value.astype('<f4').tobytes()
+                    for layer in new_model.layers
+                    for value in layer.get_weights()
+                )
+                with open(os.path.join(output_dir, 'weights.bin'), 'wb') as f:
+                    f.write(weight_data)
+
+                json_future.result()
 
             print("✅ Manual conversion completed!")
 
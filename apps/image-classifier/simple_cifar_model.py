@@ -135,157 +135,55 @@ def create_simple_cifar_model():
             size = os.path.getsize(file_path)
             print("6s")
 
-    print("
-🎉 Simple CIFAR-10 model ready!")
-    print("📂 Model location: /simple_tfjs_model/model.json"
+    print("\n🎉 Simple CIFAR-10 model ready!")
+    print("📂 Model location: /simple_tfjs_model/model.json")
     return True
 
 def manual_conversion(model, output_dir):
     """Manual TF.js conversion for cases where converter fails"""
     print("🔧 Using manual TF.js conversion...")
 
-    # Get model weights
-    weights = model.get_weights()
-    if not weights:
+    # This layers-model fallback only loads in TF.js under tf_keras
+    # (TF_USE_LEGACY_KERAS=1). Keras 3's to_json() topology (batch_shape,
+    # DTypePolicy) is not readable by tf.loadLayersModel.
+    if not tf.keras.__version__.startswith('2.'):
+        print("⚠️ Keras 3 topology: the fallback model.json will not load in TF.js."
+              " Re-run with TF_USE_LEGACY_KERAS=1")
+
+    # Serialize every weight as little-endian float32, recording each one
+    # in the manifest in the same order so TF.js can slice weights.bin
+    weight_specs = []
+    weight_data = []
+    for layer in model.layers:
+        for variable, value in zip(layer.weights, layer.get_weights()):
+            name = variable.name.split(':')[0]
+            if '/' not in name:
+                name = f"{layer.name}/{name}"
+            weight_specs.append({
+                'name': name,
+                'shape': list(value.shape),
+                'dtype': 'float32'
+            })
+            weight_data.append(value.astype('<f4').tobytes())
+
+    if not weight_specs:
         print("❌ Could not extract model weights")
         return False
 
-    # Save weights as binary file
-    weight_data = b''
-    for w in weights:
-        weight_data += w.tobytes()
-
     weights_path = os.path.join(output_dir, 'weights.bin')
     with open(weights_path, 'wb') as f:
-        f.write(weight_data)
+        f.write(b''.join(weight_data))
 
     print("✅ Weights saved to weights.bin")
 
-    # Create model.json with layer information
+    # Create model.json, taking the topology from the model itself so it
+    # always matches the trained architecture and input size (loadable by
+    # TF.js only when this runs under tf_keras, see above)
     model_json = {
-        'modelTopology': {
-            'keras_version': tf.keras.__version__,
-            'backend': 'tensorflow',
-            'model_config': {
-                'class_name': 'Sequential',
-                'config': {
-                    'name': 'sequential',
-                    'layers': [
-                        {
-                            'class_name': 'InputLayer',
-                            'config': {
-                                'batch_input_shape': [None, 32, 32, 3],
-                                'dtype': 'float32',
-                                'sparse': False,
-                                'name': 'input_layer'
-                            }
-                        },
-                        {
-                            'class_name': 'Conv2D',
-                            'config': {
-                                'filters': 32,
-                                'kernel_size': [3, 3],
-                                'strides': [1, 1],
-                                'padding': 'same',
-                                'activation': 'relu',
-                                'name': 'conv2d'
-                            }
-                        },
-                        {
-                            'class_name': 'BatchNormalization',
-                            'config': {'name': 'batch_normalization'}
-                        },
-                        {
-                            'class_name': 'MaxPooling2D',
-                            'config': {
-                                'pool_size': [2, 2],
-                                'strides': [2, 2],
-                                'padding': 'valid',
-                                'name': 'max_pooling2d'
-                            }
-                        },
-                        {
-                            'class_name': 'Conv2D',
-                            'config': {
-                                'filters': 64,
-                                'kernel_size': [3, 3],
-                                'strides': [1, 1],
-                                'padding': 'same',
-                                'activation': 'relu',
-                                'name': 'conv2d_1'
-                            }
-                        },
-                        {
-                            'class_name': 'BatchNormalization',
-                            'config': {'name': 'batch_normalization_1'}
-                        },
-                        {
-                            'class_name': 'MaxPooling2D',
-                            'config': {
-                                'pool_size': [2, 2],
-                                'strides': [2, 2],
-                                'padding': 'valid',
-                                'name': 'max_pooling2d_1'
-                            }
-                        },
-                        {
-                            'class_name': 'Conv2D',
-                            'config': {
-                                'filters': 128,
-                                'kernel_size': [3, 3],
-                                'strides': [1, 1],
-                                'padding': 'same',
-                                'activation': 'relu',
-                                'name': 'conv2d_2'
-                            }
-                        },
-                        {
-                            'class_name': 'BatchNormalization',
-                            'config': {'name': 'batch_normalization_2'}
-                        },
-                        {
-                            'class_name': 'MaxPooling2D',
-                            'config': {
-                                'pool_size': [2, 2],
-                                'strides': [2, 2],
-                                'padding': 'valid',
-                                'name': 'max_pooling2d_2'
-                            }
-                        },
-                        {
-                            'class_name': 'Flatten',
-                            'config': {'name': 'flatten'}
-                        },
-                        {
-                            'class_name': 'Dense',
-                            'config': {
-                                'units': 256,
-                                'activation': 'relu',
-                                'name': 'dense'
-                            }
-                        },
-                        {
-                            'class_name': 'Dropout',
-                            'config': {
-                                'rate': 0.5,
-                                'name': 'dropout'
-                            }
-                        },
-                        {
-                            'class_name': 'Dense',
-                            'config': {
-                                'units': 10,
-                                'activation': 'softmax',
-                                'name': 'dense_1'
-                            }
-                        }
-                    ]
-                }
-            }
-        },
+        'modelTopology': json.loads(model.to_json()),
         'weightsManifest': [{
             'paths': ['weights.bin'],
-            'weights': []
+            'weights': weight_specs
         }],
         'format': 'layers-model',
         'generatedBy': 'TensorFlow.js',
@@ -4,7 +4,13 @@ Simple script to manually upload model files to Hugging Face
 """
 
 import os
-from huggingface_hub import HfApi
+import importlib.util
+
+# Use the Rust hf_transfer backend for parallel chunked uploads when it is
+# installed (pip install hf_transfer). Must be set before huggingface_hub is
+# imported in upload_files().
+if importlib.util.find_spec('hf_transfer'):
+    os.environ.setdefault('HF_HUB_ENABLE_HF_TRANSFER', '1')
 
 def upload_files():
     """Upload the prepared model files to Hugging Face Hub"""
@@ -19,18 +25,10 @@ def upload_files():
     # Repository details
     repo_id = "TrashHobbit/dakota-ai-cifar10-classifier"
 
-    api = HfApi()
-    api.set_access_token(HF_TOKEN)
+    from huggingface_hub import HfApi, CommitOperationAdd
+    from huggingface_hub.utils import RepositoryNotFoundError
 
-    # Check if repository exists
-    try:
-        api.repo_info(repo_id)
-        print(f"✅ Repository found: {repo_id}")
-    except Exception as e:
-        print(f"❌ Repository not found: {e}")
-        print("The repository may not be fully created yet.")
-        print("Please check: https://huggingface.co/TrashHobbit/dakota-ai-cifar10-classifier")
-        return
+    api = HfApi(token=HF_TOKEN)
 
     # Files to upload
     files_to_upload = [
@@ -42,37 +40,43 @@ def upload_files():
     print("🚀 Uploading files to Hugging Face Hub...")
     print(f"Repository: {repo_id}")
 
+    operations = []
     for filepath in files_to_upload:
         if os.path.exists(filepath):
-            print(f"📤 Uploading: {filepath}")
-            try:
-                api.upload_file(
-                    path_or_fileobj=filepath,
-                    path_in_repo=filepath,
-                    repo_id=repo_id,
-                    repo_type="model"
-                )
-                print(f"✅ Uploaded: {filepath}")
-            except Exception as e:
-                print(f"❌ Failed to upload {filepath}: {e}")
+            print(f"📤 Adding: {filepath}")
+            operations.append(CommitOperationAdd(path_in_repo=filepath, path_or_fileobj=filepath))
         else:
             print(f"⚠️ File not found: {filepath}")
             print("Make sure the file exists and try again.")
 
-    # Upload SavedModel variables directory
+    # Add SavedModel variables directory. It is a single ~40 MB data shard plus
+    # its index, too small for upload_large_folder's chunked workers to pay off.
     variables_dir = "saved_model/variables"
     if os.path.exists(variables_dir):
-        print(f"📤 Uploading variables directory: {variables_dir}")
+        print(f"📤 Adding variables directory: {variables_dir}")
+        for filename in sorted(os.listdir(variables_dir)):
+            filepath = os.path.join(variables_dir, filename)
+            operations.append(CommitOperationAdd(path_in_repo=filepath, path_or_fileobj=filepath))
+
+    # Push everything in a single commit instead of one commit per file.
+    # No repo_info preflight: a missing repository surfaces here instead.
+    if operations:
         try:
-            api.upload_folder(
-                folder_path=variables_dir,
-                path_in_repo="saved_model/variables",
+            api.create_commit(
                 repo_id=repo_id,
+                operations=operations,
+                commit_message="Upload model",
                 repo_type="model"
             )
-            print("✅ Uploaded variables directory")
+            print(f"✅ Uploaded {len(operations)} files")
+        except RepositoryNotFoundError as e:
+            print(f"❌ Repository not found: {e}")
+            print("The repository may not be fully created yet.")
+            print(f"Please check: https://huggingface.co/{repo_id}")
+            return
         except Exception as e:
-            print(f"❌ Failed to upload variables: {e}")
+            print(f"❌ Upload failed: {e}")
+            return
 
     print(f"\n🎉 Upload complete!")
     print(f"📦 Model available at: https://huggingface.co/{repo_id}")